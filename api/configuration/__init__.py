@@ -1,7 +1,13 @@
 from typing import Any, Callable
 
 from fastapi import UploadFile
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.errors import FileContentTypeError
@@ -27,6 +33,7 @@ class Configuration:
     """
 
     __session_maker: Callable[[], Session]
+    __async_session_maker: Callable[[], AsyncSession]
 
     __jwt_secret: str
     __application_data_path: str
@@ -36,6 +43,7 @@ class Configuration:
         session_maker: Callable[[], Session] | None = None,
         jwt_secret: str | None = None,
         application_data_path: str | None = None,
+        async_session_maker: Callable[[], AsyncSession] | None = None,
     ) -> None:
         """Initialize the configuration of the FastAPI application.
 
@@ -53,15 +61,19 @@ class Configuration:
             environment variables. If not found, the state will use a \
             directory `quickdish` in user data directory. The state will \
             ensure that the directory exists and is writable.
+        :param async_session_maker: The function that returns a new \
+            SQLAlchemy `AsyncSession`. If `None` the configuration will look \
+            for `ASYNC_DATABASE_URL`, then `DATABASE_URL` in the environment \
+            variables and creates an asyncpg session maker from it.
 
         Raises:
             RuntimeError: if the DATABASE_URL or JWT_SECRET environment
                 variables are not set.
         """
 
-        if session_maker:
-            self.__session_maker = session_maker
-        else:
+        database_url = ""
+
+        if not session_maker or not async_session_maker:
             dotenv.load_dotenv()
             database_url = os.getenv("DATABASE_URL")
 
@@ -70,6 +82,9 @@ class Configuration:
                     "DATABASE_URL environment variable is not set"
                 )
 
+        if session_maker:
+            self.__session_maker = session_maker
+        else:
             engine = create_engine(database_url, connect_args={})
 
             # run migrations
@@ -81,6 +96,17 @@ class Configuration:
 
             Base.metadata.create_all(bind=engine)
 
+        if async_session_maker:
+            self.__async_session_maker = async_session_maker
+        else:
+            async_engine = self.__create_async_engine(database_url)
+
+            # expired attributes can't be implicitly reloaded with an
+            # `AsyncSession`, so keep them loaded after a commit
+            self.__async_session_maker = async_sessionmaker(
+                bind=async_engine, autoflush=False, expire_on_commit=False
+            )
+
         if jwt_secret:
             self.__jwt_secret = jwt_secret
         else:
@@ -125,6 +151,54 @@ class Configuration:
                 f"{self.__application_data_path} is not writable"
             )
 
+    def __create_async_engine(self, database_url: str) -> AsyncEngine:
+        """Create the asyncpg engine used by the `AsyncSession`.
+
+        If `ASYNC_DATABASE_URL` is set, it's used as is. Otherwise, the engine
+        is derived from `database_url`: the driver is replaced with `asyncpg`
+        and the libpq query parameters, which asyncpg's `connect` rejects, are
+        translated to their asyncpg arguments or dropped.
+
+        :param database_url: The `DATABASE_URL` of the synchronous engine.
+
+        Returns:
+            The asyncpg engine.
+        """
+
+        async_database_url = os.getenv("ASYNC_DATABASE_URL")
+
+        if async_database_url:
+            return create_async_engine(async_database_url)
+
+        url = make_url(database_url)
+        query = {
+            key: value if isinstance(value, str) else value[-1]
+            for key, value in url.query.items()
+        }
+
+        # prepared statements don't survive a transaction pooling pgbouncer,
+        # which is common in front of hosted PostgreSQL, so don't cache them
+        connect_args: dict[str, Any] = {"statement_cache_size": 0}
+
+        if "sslmode" in query:
+            # asyncpg accepts the libpq ssl modes as is
+            connect_args["ssl"] = query["sslmode"]
+
+        if "connect_timeout" in query:
+            connect_args["timeout"] = float(query["connect_timeout"])
+
+        if "application_name" in query:
+            connect_args["server_settings"] = {
+                "application_name": query["application_name"]
+            }
+
+        url = url.set(
+            drivername="postgresql+asyncpg",
+            query={"prepared_statement_cache_size": "0"},
+        )
+
+        return create_async_engine(url, connect_args=connect_args)
+
     def create_session(self) -> Session:
         """Create a new SQLAlchemy session.
 
@@ -136,6 +210,17 @@ class Configuration:
 
         return self.__session_maker()
 
+    def create_async_session(self) -> AsyncSession:
+        """Create a new SQLAlchemy `AsyncSession`.
+
+        This function shouldn't be used directly within the CRUD functions.
+        Instead, use the `State` via `get_state` dependency.
+
+        :return: A new SQLAlchemy `AsyncSession`.
+        """
+
+        return self.__async_session_maker()
+
     @property
     def jwt_secret(self) -> str:
         """Get the JWT secret key.
@@ -1,10 +1,14 @@
+from collections import Counter, defaultdict
 from decimal import Decimal
-from threading import Lock
+from typing import Any, Callable
 
-from sqlalchemy import ColumnElement, false, or_
-from api.crud.restaurant import get_restaurant
+from pydantic import BaseModel
+from sqlalchemy import Row, select, update
+from sqlalchemy.orm import selectinload
+from api.configuration import Configuration
 from api.dependencies.id import Role
-from api.errors import InvalidArgumentError, NotFoundError
+from api.dependencies.state import create_state
+from api.errors import ConflictingError, InvalidArgumentError, NotFoundError
 from api.errors.authentication import UnauthorizedError
 from api.errors.internal import InternalServerError
 from api.models.order import (
@@ -41,6 +45,7 @@ from api.schemas.order import (
 )
 from api.state import State
 
+import asyncio
 import time
 
 
@@ -50,15 +55,15 @@ class OrderEvent:
     """
 
     __notifications_by_order_id: dict[Order, list[OrderNotification]]
-    __state: State
-    __mutex: Lock
+    __configuration: Configuration
+    __mutex: asyncio.Lock
 
-    def __init__(self, state: State) -> None:
+    def __init__(self, configuration: Configuration) -> None:
         self.__notifications_by_order_id = {}
-        self.__state = state
-        self.__mutex = Lock()
+        self.__configuration = configuration
+        self.__mutex = asyncio.Lock()
 
-    def register(self, order: Order) -> bool:
+    async def register(self, order: Order) -> bool:
         """
         Registers the order so that it will recieve further notifications.
 
@@ -71,7 +76,7 @@ class OrderEvent:
                 otherwise.
         """
 
-        with self.__mutex:
+        async with self.__mutex:
             if (
                 order.status == OrderStatusFlag.SETTLED
                 or order.status == OrderStatusFlag.CANCELLED
@@ -93,13 +98,15 @@ class OrderEvent:
         orders in the same restaurant.
         """
 
-        with self.__mutex:
+        # the event outlives the requests, so it can't borrow a request's
+        # sessions; they would be closed and shared between concurrent tasks
+        async with self.__mutex, create_state(self.__configuration) as state:
             if order in self.__notifications_by_order_id:
                 self.__notifications_by_order_id[order].append(
                     StatusChangeNotification(
                         order_id=order.id,
                         status=await get_order_status_no_validation(
-                            self.__state, order
+                            state, order
                         ),
                     )
                 )
@@ -120,7 +127,7 @@ class OrderEvent:
                 notification = QueueChangeNotification(
                     order_id=other_order.id,
                     queue=await get_order_queue_no_validation(
-                        self.__state, other_order
+                        state, other_order
                     ),
                 )
 
@@ -145,7 +152,7 @@ class OrderEvent:
             but there are no notifications for it.
         """
 
-        with self.__mutex:
+        async with self.__mutex:
             if order not in self.__notifications_by_order_id:
                 return None
 
@@ -168,18 +175,66 @@ async def create_order(
     """Creates a new order placed by a customer."""
 
     # check if the restaurant exists
-    restaurant = await get_restaurant(state, payload.restaurant_id)
+    restaurant = await state.async_session.get(
+        Restaurant, payload.restaurant_id
+    )
+
+    if not restaurant:
+        raise NotFoundError("restaurant not found")
+
     price_paid = Decimal(0)
     ordered_at = int(time.time())
 
+    menu_ids = {order.menu_id for order in payload.items}
+    option_ids = {
+        option.option_id for order in payload.items for option in order.options
+    }
+
+    # fetch only the columns needed to validate the order, all at once
+    menus = await state.async_session.execute(
+        select(Menu.id, Menu.restaurant_id, Menu.price).where(
+            Menu.id.in_(menu_ids)
+        )
+    )
+    menus_by_id = {menu.id: menu for menu in menus}
+
+    options = await state.async_session.execute(
+        select(
+            Option.id,
+            Option.extra_price,
+            Customization.id.label("customization_id"),
+            Customization.menu_id,
+        )
+        .join(Customization, Customization.id == Option.customization_id)
+        .where(Option.id.in_(option_ids))
+    )
+    options_by_id = {option.id: option for option in options}
+
+    customizations = await state.async_session.execute(
+        select(
+            Customization.id,
+            Customization.menu_id,
+            Customization.required,
+            Customization.unique,
+        ).where(
+            (Customization.menu_id.in_(menu_ids))
+            # only these customizations constrain the chosen options
+            & (Customization.required | Customization.unique)
+        )
+    )
+
+    customizations_by_menu_id = defaultdict[
+        int, list[Row[tuple[int, int, bool, bool]]]
+    ](list)
+    for customization in customizations:
+        customizations_by_menu_id[customization.menu_id].append(customization)
+
     for order in payload.items:
         # check if the menu exists in the restaurant
-        menu = (
-            state.session.query(Menu).filter(Menu.id == order.menu_id).first()
-        )
+        menu = menus_by_id.get(order.menu_id)
 
         if not menu:
-            raise NotFoundError("menu with id {order.menu_id} not found")
+            raise NotFoundError(f"menu with id {order.menu_id} not found")
 
         # check if the menu is actually in the same restaurant
         if menu.restaurant_id != restaurant.id:
@@ -192,68 +247,62 @@ async def create_order(
                 f"menu with id {order.menu_id} must have a quantity of at least 1"
             )
 
-        price_paid += Decimal(menu.price)
+        price_paid += menu.price
 
-        seen_customizations = list[int]()
+        seen_customizations = Counter[int]()
 
         # check if the option ids are a part of the menu
         for option_create in order.options:
             option_id = option_create.option_id
 
-            result = (
-                state.session.query(Option, Customization)
-                .filter(
-                    (Option.id == option_id)
-                    & (Customization.id == Option.customization_id)
-                )
-                .first()
-            )
+            option = options_by_id.get(option_id)
 
-            if result is None:
+            if option is None:
                 raise NotFoundError(
                     f"the option with id {option_id} not found"
                 )
 
-            option = result[0]
-            customization = result[1]
-
-            if customization.menu_id != menu.id:
+            if option.menu_id != menu.id:
                 raise InvalidArgumentError(
                     f"the option with id {option_id} is not in menu with id {menu.id}"
                 )
 
-            seen_customizations.append(customization.id)
+            seen_customizations[option.customization_id] += 1
 
             if option.extra_price is not None:
-                price_paid += Decimal(option.extra_price)
+                price_paid += option.extra_price
+
+        menu_customizations = customizations_by_menu_id[menu.id]
 
         # check if all the required customizations are present
-        required_menu_customizations = (
-            state.session.query(Customization)
-            .filter(
-                (Customization.menu_id == menu.id) & (Customization.required)
+        required_customization_ids = {
+            customization.id
+            for customization in menu_customizations
+            if customization.required
+        }
+
+        if missing_customization_ids := (
+            required_customization_ids - seen_customizations.keys()
+        ):
+            missing_ids = ", ".join(
+                str(customization_id)
+                for customization_id in sorted(missing_customization_ids)
             )
-            .all()
-        )
 
-        for required_customization in required_menu_customizations:
-            if required_customization.id not in seen_customizations:
-                raise InvalidArgumentError(
-                    f"menu with id {menu.id} requires customization with id {required_customization.id}"
-                )
+            raise InvalidArgumentError(
+                f"menu with id {menu.id} requires customization with id {missing_ids}"
+            )
 
         # check if the unique customizations are actually unique
-        unique_customizations = (
-            state.session.query(Customization)
-            .filter(
-                (Customization.menu_id == menu.id) & (Customization.unique)
-            )
-            .all()
-        )
+        unique_customizations = [
+            customization
+            for customization in menu_customizations
+            if customization.unique
+        ]
 
         for unique_customization in unique_customizations:
             # the number of customizations with the same id must be at most 1
-            if seen_customizations.count(unique_customization.id) > 1:
+            if seen_customizations[unique_customization.id] > 1:
                 raise InvalidArgumentError(
                     f"menu with id {menu.id} requires customization with id {unique_customization.id} to be unique"
                 )
@@ -263,35 +312,41 @@ async def create_order(
         restaurant_id=restaurant.id,
         ordered_at=ordered_at,
         price_paid=price_paid,
-        status=str(OrderStatusFlag.ORDERED),
+        status=OrderStatusFlag.ORDERED,
     )
 
-    state.session.add(sql_order)
-    state.session.flush()
+    # flushing populates the id of the order
+    state.async_session.add(sql_order)
+    await state.async_session.flush()
 
-    state.session.refresh(sql_order)
+    order_id = sql_order.id
 
-    for order in payload.items:
-        order_item = OrderItem(
-            order_id=sql_order.id,
+    order_items = [
+        OrderItem(
+            order_id=order_id,
             menu_id=order.menu_id,
             quantity=order.quantity,
             extra_requests=order.extra_requests,
         )
-        state.session.add(order_item)
-        state.session.commit()
+        for order in payload.items
+    ]
 
-        state.session.refresh(order_item)
+    # flushing populates the ids of the order items
+    state.async_session.add_all(order_items)
+    await state.async_session.flush()
 
-        for option in order.options:
-            state.session.add(
-                OrderOption(
-                    order_item_id=order_item.id, option_id=option.option_id
-                )
+    state.async_session.add_all(
+        [
+            OrderOption(
+                order_item_id=order_item.id, option_id=option.option_id
             )
-            state.session.commit()
+            for order_item, order in zip(order_items, payload.items)
+            for option in order.options
+        ]
+    )
+    await state.async_session.commit()
 
-    return sql_order.id
+    return order_id
 
 
 async def get_order_status_no_validation(
@@ -302,10 +357,8 @@ async def get_order_status_no_validation(
             return OrderedOrderSchema()
 
         case OrderStatusFlag.CANCELLED:
-            cancelled_query = (
-                state.session.query(CancelledOrder)
-                .filter(CancelledOrder.order_id == order.id)
-                .first()
+            cancelled_query = await state.async_session.get(
+                CancelledOrder, order.id
             )
 
             if not cancelled_query:
@@ -319,10 +372,8 @@ async def get_order_status_no_validation(
             )
 
         case OrderStatusFlag.PREPARING:
-            preparing_query = (
-                state.session.query(PreparingOrder)
-                .filter(PreparingOrder.order_id == order.id)
-                .first()
+            preparing_query = await state.async_session.get(
+                PreparingOrder, order.id
             )
 
             if not preparing_query:
@@ -334,11 +385,7 @@ async def get_order_status_no_validation(
             )
 
         case OrderStatusFlag.READY:
-            ready_query = (
-                state.session.query(ReadyOrder)
-                .filter(ReadyOrder.order_id == order.id)
-                .first()
-            )
+            ready_query = await state.async_session.get(ReadyOrder, order.id)
 
             if not ready_query:
                 # this should never happen
@@ -347,10 +394,8 @@ async def get_order_status_no_validation(
             return ReadyOrderSchema(ready_at=ready_query.ready_at)
 
         case OrderStatusFlag.SETTLED:
-            settled_query = (
-                state.session.query(SettledOrder)
-                .filter(SettledOrder.order_id == order.id)
-                .first()
+            settled_query = await state.async_session.get(
+                SettledOrder, order.id
             )
 
             if not settled_query:
@@ -360,12 +405,7 @@ async def get_order_status_no_validation(
             return SettledOrderSchema(settled_at=settled_query.settled_at)
 
 
-async def convert_to_schema(
-    state: State,
-    order: Order,
-) -> OrderSchema:
-    status = await get_order_status_no_validation(state, order)
-
+def __order_to_schema(order: Order, status: OrderStatus) -> OrderSchema:
     return OrderSchema(
         id=order.id,
         restaurant_id=order.restaurant_id,
@@ -373,61 +413,137 @@ async def convert_to_schema(
         status=status,
         ordered_at=order.ordered_at,
         price_paid=order.price_paid,
-        items=[OrderItemSchema.model_validate(item) for item in order.items],
+        items=[OrderItemSchema.from_orm_fast(item) for item in order.items],
     )
 
 
+async def convert_many_to_schema(
+    state: State,
+    orders: list[Order],
+) -> list[OrderSchema]:
+    """
+    Converts the orders to schemas. The status information is fetched with at
+    most one query per status, and the items must already be loaded, e.g.
+    with `selectinload`, as they can't be lazily loaded on an `AsyncSession`.
+    """
+
+    order_ids_by_status = defaultdict[OrderStatusFlag, list[int]](list)
+    for order in orders:
+        order_ids_by_status[order.status].append(order.id)
+
+    statuses_by_order_id: dict[int, OrderStatus] = {
+        order_id: OrderedOrderSchema()
+        for order_id in order_ids_by_status[OrderStatusFlag.ORDERED]
+    }
+
+    if order_ids := order_ids_by_status[OrderStatusFlag.CANCELLED]:
+        for cancelled_order in await state.async_session.scalars(
+            select(CancelledOrder).where(
+                CancelledOrder.order_id.in_(order_ids)
+            )
+        ):
+            statuses_by_order_id[cancelled_order.order_id] = (
+                CancelledOrderSchema(
+                    cancelled_by=cancelled_order.cancelled_by,
+                    cancelled_time=cancelled_order.cancelled_time,
+                    reason=cancelled_order.reason,
+                )
+            )
+
+    if order_ids := order_ids_by_status[OrderStatusFlag.PREPARING]:
+        for preparing_order in await state.async_session.scalars(
+            select(PreparingOrder).where(
+                PreparingOrder.order_id.in_(order_ids)
+            )
+        ):
+            statuses_by_order_id[preparing_order.order_id] = (
+                PreparingOrderSchema(prepared_at=preparing_order.prepared_at)
+            )
+
+    if order_ids := order_ids_by_status[OrderStatusFlag.READY]:
+        for ready_order in await state.async_session.scalars(
+            select(ReadyOrder).where(ReadyOrder.order_id.in_(order_ids))
+        ):
+            statuses_by_order_id[ready_order.order_id] = ReadyOrderSchema(
+                ready_at=ready_order.ready_at
+            )
+
+    if order_ids := order_ids_by_status[OrderStatusFlag.SETTLED]:
+        for settled_order in await state.async_session.scalars(
+            select(SettledOrder).where(SettledOrder.order_id.in_(order_ids))
+        ):
+            statuses_by_order_id[settled_order.order_id] = SettledOrderSchema(
+                settled_at=settled_order.settled_at
+            )
+
+    schemas: list[OrderSchema] = []
+
+    for order in orders:
+        status = statuses_by_order_id.get(order.id)
+
+        if status is None:
+            # this should never happen
+            raise InternalServerError(
+                f"can't find the {order.status.lower()} order"
+            )
+
+        schemas.append(__order_to_schema(order, status))
+
+    return schemas
+
+
 async def get_orders(
     state: State,
     user_id: int,
     role: Role,
     restaurant_id_filter: int | None,
     status_filter: list[OrderStatusFlag],
+    limit: int = 100,
+    offset: int = 0,
 ) -> list[Order]:
-    status_filter_query: list[ColumnElement[bool]] = []
-    for status in status_filter:
-        status_filter_query.append(Order.status == status)
+    """
+    Gets a page of the orders of the customer or the restaurants of the
+    merchant, the most recent orders first.
+    """
+
+    if limit < 1:
+        raise InvalidArgumentError("limit must be greater than 0")
+
+    if limit > 100:
+        raise InvalidArgumentError("limit must not be greater than 100")
+
+    if offset < 0:
+        raise InvalidArgumentError("offset must not be negative")
+
+    query = select(Order).options(
+        selectinload(Order.items).selectinload(OrderItem.options)
+    )
 
     match role:
         case Role.CUSTOMER:
-
-            return (
-                state.session.query(Order)
-                .filter(
-                    (Order.customer_id == user_id)
-                    & (
-                        or_(false(), *status_filter_query)
-                        if len(status_filter_query) != 0
-                        else True
-                    )
-                    & (
-                        Order.restaurant_id == restaurant_id_filter
-                        if restaurant_id_filter is not None
-                        else True
-                    )
-                )
-                .all()
-            )
+            query = query.where(Order.customer_id == user_id)
 
         case Role.MERCHANT:
-            return (
-                state.session.query(Order)
-                .filter(
-                    (Restaurant.merchant_id == user_id)
-                    & (Order.restaurant_id == Restaurant.id)
-                    & (
-                        or_(false(), *status_filter_query)
-                        if len(status_filter_query) != 0
-                        else True
-                    )
-                    & (
-                        Order.restaurant_id == restaurant_id_filter
-                        if restaurant_id_filter is not None
-                        else True
-                    )
-                )
-                .all()
-            )
+            query = query.join(
+                Restaurant, Order.restaurant_id == Restaurant.id
+            ).where(Restaurant.merchant_id == user_id)
+
+    # only add the predicates that are actually needed
+    if len(status_filter) != 0:
+        query = query.where(Order.status.in_(status_filter))
+
+    if restaurant_id_filter is not None:
+        query = query.where(Order.restaurant_id == restaurant_id_filter)
+
+    # the id breaks ties between the orders placed in the same second so the
+    # pages are stable
+    query = (
+        query.order_by(Order.ordered_at.desc(), Order.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+
+    return list(await state.async_session.scalars(query))
 
 
 async def get_order_with_validation(
@@ -436,9 +552,9 @@ async def get_order_with_validation(
     role: Role,
     order_id: int,
 ) -> Order:
-    order = state.session.query(Order).filter(Order.id == order_id).first()
+    order = await state.async_session.get(Order, order_id)
     if not order:
-        raise NotFoundError("order with id {order_id} not found")
+        raise NotFoundError(f"order with id {order_id} not found")
 
     match role:
         case Role.CUSTOMER:
@@ -446,16 +562,11 @@ async def get_order_with_validation(
                 raise UnauthorizedError("customer does not own the order")
 
         case Role.MERCHANT:
-            result = (
-                state.session.query(Restaurant)
-                .filter(
-                    (Restaurant.merchant_id == user_id)
-                    & (Restaurant.id == order.restaurant_id)
-                )
-                .first()
+            restaurant = await state.async_session.get(
+                Restaurant, order.restaurant_id
             )
 
-            if not result:
+            if not restaurant or restaurant.merchant_id != user_id:
                 raise UnauthorizedError("merchant does not own the order")
 
     return order
@@ -469,6 +580,94 @@ async def get_order_status(
     return await get_order_status_no_validation(state, order)
 
 
+__ORDER_STATUS_TRANSITIONS: dict[
+    tuple[Role, OrderStatusFlag, type[BaseModel]],
+    tuple[
+        Callable[
+            [Order, Any, int],
+            CancelledOrder | PreparingOrder | ReadyOrder | SettledOrder,
+        ],
+        OrderStatusFlag,
+    ],
+] = {
+    # still can cancel the order
+    (Role.CUSTOMER, OrderStatusFlag.ORDERED, CancelledOrderUpdate): (
+        lambda order, status, now: CancelledOrder(
+            order_id=order.id,
+            cancelled_time=now,
+            cancelled_by=OrderCancelledBy.CUSTOMER,
+            reason=status.reason,
+        ),
+        OrderStatusFlag.CANCELLED,
+    ),
+    (Role.CUSTOMER, OrderStatusFlag.READY, SettledOrderUpdate): (
+        lambda order, _, now: SettledOrder(order_id=order.id, settled_at=now),
+        OrderStatusFlag.SETTLED,
+    ),
+    (Role.MERCHANT, OrderStatusFlag.ORDERED, PreparingOrderUpdate): (
+        lambda order, _, now: PreparingOrder(
+            order_id=order.id, prepared_at=now
+        ),
+        OrderStatusFlag.PREPARING,
+    ),
+    (Role.MERCHANT, OrderStatusFlag.PREPARING, ReadyOrderUpdate): (
+        lambda order, _, now: ReadyOrder(order_id=order.id, ready_at=now),
+        OrderStatusFlag.READY,
+    ),
+    (Role.MERCHANT, OrderStatusFlag.ORDERED, CancelledOrderUpdate): (
+        lambda order, status, now: CancelledOrder(
+            order_id=order.id,
+            cancelled_time=now,
+            cancelled_by=OrderCancelledBy.MERCHANT,
+            reason=status.reason,
+        ),
+        OrderStatusFlag.CANCELLED,
+    ),
+    (Role.MERCHANT, OrderStatusFlag.PREPARING, CancelledOrderUpdate): (
+        lambda order, status, now: CancelledOrder(
+            order_id=order.id,
+            cancelled_time=now,
+            cancelled_by=OrderCancelledBy.MERCHANT,
+            reason=status.reason,
+        ),
+        OrderStatusFlag.CANCELLED,
+    ),
+}
+"""
+The allowed order status transitions. Maps the role, the current status, and
+the requested status update to a function creating the status row and the
+resulting status.
+"""
+
+__ORDER_STATUS_TRANSITION_ERRORS: dict[tuple[Role, type[BaseModel]], str] = {
+    (Role.CUSTOMER, CancelledOrderUpdate): "order can't be cancelled anymore",
+    (
+        Role.CUSTOMER,
+        SettledOrderUpdate,
+    ): "order can only be settled when it's ready",
+    (
+        Role.CUSTOMER,
+        PreparingOrderUpdate,
+    ): "only cancellation or settled are allowed",
+    (
+        Role.CUSTOMER,
+        ReadyOrderUpdate,
+    ): "only cancellation or settled are allowed",
+    (Role.MERCHANT, PreparingOrderUpdate): "order can be prepared only once",
+    (
+        Role.MERCHANT,
+        ReadyOrderUpdate,
+    ): "order can be ready after it's prepared",
+    (Role.MERCHANT, CancelledOrderUpdate): "order can't be cancelled anymore",
+    (Role.MERCHANT, SettledOrderUpdate): "order can't be settled by merchant",
+}
+"""
+The error messages for the status updates that aren't in
+`__ORDER_STATUS_TRANSITIONS`, keyed by the role and the requested status
+update.
+"""
+
+
 async def update_order_status(
     state: State,
     order_event: OrderEvent,
@@ -478,94 +677,38 @@ async def update_order_status(
     status: OrderStatusUpdate,
 ) -> None:
     order = await get_order_with_validation(state, user_id, role, order_id)
+    now = int(time.time())
 
-    match role, order.status, status:
-        # still can cancel the order
-        case Role.CUSTOMER, OrderStatusFlag.ORDERED, CancelledOrderUpdate():
-            state.session.add(
-                CancelledOrder(
-                    order_id=order.id,
-                    cancelled_time=int(time.time()),
-                    cancelled_by=OrderCancelledBy.CUSTOMER,
-                    reason=status.reason,
-                )
-            )
-            order.status = OrderStatusFlag.CANCELLED
-
-            state.session.commit()
-            await order_event.order_status_change(order)
-
-        case Role.CUSTOMER, OrderStatusFlag.READY, SettledOrderUpdate():
-            state.session.add(
-                SettledOrder(order_id=order.id, settled_at=int(time.time()))
-            )
-            order.status = OrderStatusFlag.SETTLED
-
-            state.session.commit()
-            await order_event.order_status_change(order)
-
-        case Role.CUSTOMER, _, CancelledOrderUpdate():
-            raise InvalidArgumentError("order can't be cancelled anymore")
-
-        case Role.CUSTOMER, _, SettledOrderUpdate():
-            raise InvalidArgumentError(
-                "order can only be settled when it's ready"
-            )
-
-        case Role.CUSTOMER, _, _:
-            raise InvalidArgumentError(
-                "only cancellation or settled are allowed"
-            )
-
-        case Role.MERCHANT, OrderStatusFlag.ORDERED, PreparingOrderUpdate():
-            state.session.add(
-                PreparingOrder(order_id=order.id, prepared_at=int(time.time()))
-            )
-            order.status = OrderStatusFlag.PREPARING
-
-            state.session.commit()
-            await order_event.order_status_change(order)
-
-        case Role.MERCHANT, _, PreparingOrderUpdate():
-            raise InvalidArgumentError("order can be prepared only once")
-
-        case Role.MERCHANT, OrderStatusFlag.PREPARING, ReadyOrderUpdate():
-            state.session.add(
-                ReadyOrder(order_id=order.id, ready_at=int(time.time()))
-            )
-            order.status = OrderStatusFlag.READY
-
-            state.session.commit()
-            await order_event.order_status_change(order)
-
-        case Role.MERCHANT, _, ReadyOrderUpdate():
-            raise InvalidArgumentError(
-                "order can be ready after it's prepared"
-            )
+    transition = __ORDER_STATUS_TRANSITIONS.get(
+        (role, order.status, type(status))
+    )
 
-        case (
-            Role.MERCHANT,
-            (OrderStatusFlag.PREPARING | OrderStatusFlag.ORDERED),
-            CancelledOrderUpdate(),
-        ):
-            state.session.add(
-                CancelledOrder(
-                    order_id=order.id,
-                    cancelled_time=int(time.time()),
-                    cancelled_by=OrderCancelledBy.MERCHANT,
-                    reason=status.reason,
-                )
-            )
-            order.status = OrderStatusFlag.CANCELLED
+    if transition is None:
+        raise InvalidArgumentError(
+            __ORDER_STATUS_TRANSITION_ERRORS[role, type(status)]
+        )
 
-            state.session.commit()
-            await order_event.order_status_change(order)
+    create_status, new_status = transition
+
+    # only update the order if its status hasn't been changed by a concurrent
+    # request since it was validated
+    updated_order_id = (
+        await state.async_session.execute(
+            update(Order)
+            .where((Order.id == order.id) & (Order.status == order.status))
+            .values(status=new_status)
+            .returning(Order.id)
+            .execution_options(synchronize_session="fetch")
+        )
+    ).scalar_one_or_none()
 
-        case (Role.MERCHANT, _, CancelledOrderUpdate()):
-            raise InvalidArgumentError("order can't be cancelled anymore")
+    if updated_order_id is None:
+        await state.async_session.rollback()
+        raise ConflictingError("the order status has been changed")
 
-        case Role.MERCHANT, _, SettledOrderUpdate():
-            raise InvalidArgumentError("order can't be settled by merchant")
+    state.async_session.add(create_status(order, status, now))
+    await state.async_session.commit()
+    await order_event.order_status_change(order)
 
 
 async def get_order_queue(
@@ -580,33 +723,29 @@ async def get_restaurant_queue(
     state: State,
     restaurant_id: int,
 ) -> Queue:
-    orders = (
-        state.session.query(Order)
-        .filter(
+    orders = await state.async_session.scalars(
+        select(Order)
+        .options(selectinload(Order.items))
+        .where(
             (Order.restaurant_id == restaurant_id)
             & (
                 (Order.status == OrderStatusFlag.ORDERED)
                 | (Order.status == OrderStatusFlag.PREPARING)
             )
         )
-        .all()
     )
 
-    return __calculate_queue_from_prior_orders(state, orders)
+    return await __calculate_queue_from_prior_orders(state, list(orders))
 
 
-def __calculate_queue_from_prior_orders(
+async def __calculate_queue_from_prior_orders(
     state: State, prior_orders: list[Order]
 ) -> Queue:
     estimated_time = 0
 
     for prior_order in prior_orders:
         for order_item in prior_order.items:
-            menu = (
-                state.session.query(Menu)
-                .filter(Menu.id == order_item.menu_id)
-                .first()
-            )
+            menu = await state.async_session.get(Menu, order_item.menu_id)
 
             if not menu:
                 raise InternalServerError(
@@ -621,9 +760,10 @@ def __calculate_queue_from_prior_orders(
 
 
 async def get_order_queue_no_validation(state: State, order: Order) -> Queue:
-    prior_orders = (
-        state.session.query(Order)
-        .filter(
+    prior_orders = await state.async_session.scalars(
+        select(Order)
+        .options(selectinload(Order.items))
+        .where(
             (Order.restaurant_id == order.restaurant_id)
             & (Order.ordered_at <= order.ordered_at)
             & (Order.id < order.id)
@@ -632,7 +772,6 @@ async def get_order_queue_no_validation(state: State, order: Order) -> Queue:
                 | (Order.status == OrderStatusFlag.PREPARING)
             )
         )
-        .all()
     )
 
-    return __calculate_queue_from_prior_orders(state, prior_orders)
+    return await __calculate_queue_from_prior_orders(state, list(prior_orders))
@@ -1,6 +1,6 @@
+from api.configuration import Configuration
 from api.crud.order import OrderEvent
-from api.dependencies.state import get_state
-from api.state import State
+from api.dependencies.configuration import get_configuration
 
 from fastapi import Depends
 
@@ -9,13 +9,13 @@ _order_event: None | OrderEvent = None
 
 
 def get_order_event(
-    state: State = Depends(get_state),
+    configuration: Configuration = Depends(get_configuration),
 ) -> OrderEvent:
     """Use this dependency to get the `OrderEvent` object"""
 
     global _order_event
 
     if _order_event is None:
-        _order_event = OrderEvent(state)
+        _order_event = OrderEvent(configuration)
 
     return _order_event
@@ -1,16 +1,31 @@
-from typing import Generator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 from fastapi import Depends
 from api.configuration import Configuration
 from api.dependencies.configuration import get_configuration
 from api.state import State
 
 
-def get_state(
-    configuration: Configuration = Depends(get_configuration),
-) -> Generator[State, None, None]:
+@asynccontextmanager
+async def create_state(configuration: Configuration) -> AsyncIterator[State]:
+    """Create a `State` with new sessions and close them on exit.
+
+    Use this outside of a request, where the `get_state` dependency isn't
+    available.
+    """
+
     session = configuration.create_session()
+    async_session = configuration.create_async_session()
 
     try:
-        yield State(session=session)
+        yield State(session=session, async_session=async_session)
     finally:
         session.close()
+        await async_session.close()
+
+
+async def get_state(
+    configuration: Configuration = Depends(get_configuration),
+) -> AsyncGenerator[State, None]:
+    async with create_state(configuration) as state:
+        yield state
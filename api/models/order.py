@@ -3,7 +3,13 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from api.schemas.order import OrderCancelledBy, OrderStatusFlag
 
 from decimal import Decimal
-from sqlalchemy import ForeignKey, Numeric, Enum, PrimaryKeyConstraint
+from sqlalchemy import (
+    ForeignKey,
+    Index,
+    Numeric,
+    Enum,
+    PrimaryKeyConstraint,
+)
 
 
 class OrderOption(Base):
@@ -70,6 +76,15 @@ class CancelledOrder(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index(
+            "ix_orders_customer_id_status_restaurant_id",
+            "customer_id",
+            "status",
+            "restaurant_id",
+        ),
+        Index("ix_orders_restaurant_id_status", "restaurant_id", "status"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     restaurant_id: Mapped[int] = mapped_column(ForeignKey("restaurants.id"))
@@ -13,7 +13,9 @@ class Restaurant(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(unique=True)
     address: Mapped[str]
-    merchant_id: Mapped[int] = mapped_column(ForeignKey("merchants.id"))
+    merchant_id: Mapped[int] = mapped_column(
+        ForeignKey("merchants.id"), index=True
+    )
     image: Mapped[str]
     location: Mapped[Point] = mapped_column(PointType)
 
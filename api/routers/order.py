@@ -1,10 +1,11 @@
 from typing import AsyncGenerator
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer
 from sse_starlette.sse import EventSourceResponse
 
 from api.crud.order import (
-    convert_to_schema,
+    convert_many_to_schema,
     create_order,
     get_order_status,
     get_order_with_validation,
@@ -58,16 +59,21 @@ async def create_order_api(
         Gets all orders for the customer or merchant based on the JWT token.
         If authenticated as a customer, the customer's orders are returned.
         If authenticated as a merchant, the orders of all restaurants owned by 
-        the merchant are returned.
+        the merchant are returned. The orders are paginated with `limit` (at
+        most 100) and `offset`, the most recent orders first.
     """,
     dependencies=[Depends(HTTPBearer())],
+    response_model=list[Order],
+    response_class=ORJSONResponse,
 )
 async def get_orders_api(
     user: tuple[int, Role] = Depends(get_user),
     restaurant_id: int | None = None,
     status: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
     state: State = Depends(get_state),
-) -> list[Order]:
+) -> ORJSONResponse:
     try:
         id, role = user
 
@@ -77,12 +83,18 @@ async def get_orders_api(
             split_status = status.split("|")
             statuses = [OrderStatusFlag[status] for status in split_status]
 
-        return [
-            await convert_to_schema(state, order)
-            for order in await get_orders(
-                state, id, role, restaurant_id, statuses
-            )
-        ]
+        orders = await convert_many_to_schema(
+            state,
+            await get_orders(
+                state, id, role, restaurant_id, statuses, limit, offset
+            ),
+        )
+
+        # the orders are already validated schemas, returning the response
+        # directly skips FastAPI validating and encoding them again
+        return ORJSONResponse(
+            content=[order.model_dump(mode="json") for order in orders]
+        )
 
     except KeyError as e:
         raise InvalidArgumentError(f"status flag {e} is not valid")
@@ -170,7 +182,7 @@ async def order_event_api(
     state: State = Depends(get_state),
 ) -> EventSourceResponse:
     order = await get_order_with_validation(state, user[0], user[1], order_id)
-    order_event.register(order)
+    await order_event.register(order)
 
     async def event_generator() -> AsyncGenerator[str, None]:
         while True:
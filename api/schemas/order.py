@@ -1,8 +1,11 @@
 from decimal import Decimal
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 from pydantic import BaseModel, ConfigDict
 from enum import StrEnum, unique
 
+if TYPE_CHECKING:
+    from api.models.order import OrderItem as OrderItemModel
+
 
 @unique
 class OrderCancelledBy(StrEnum):
@@ -151,6 +154,28 @@ class OrderItem(OrderItemBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @classmethod
+    def from_orm_fast(cls, item: "OrderItemModel") -> "OrderItem":
+        """
+        Creates the schema from an order item fetched from the database
+        without validating it. Use `model_validate` for untrusted input.
+        """
+
+        return cls.model_construct(
+            id=item.id,
+            order_id=item.order_id,
+            menu_id=item.menu_id,
+            quantity=item.quantity,
+            extra_requests=item.extra_requests,
+            options=[
+                OrderItemOption.model_construct(
+                    order_item_id=option.order_item_id,
+                    option_id=option.option_id,
+                )
+                for option in item.options
+            ],
+        )
+
 
 class OrderBase(BaseModel):
     restaurant_id: int
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
@@ -10,3 +11,9 @@ class State:
     """
     The sqlalchemy session object used to interact with the database.
     """
+
+    async_session: AsyncSession
+    """
+    The asynchronous sqlalchemy session object used to interact with the
+    database without blocking the event loop.
+    """
@@ -2,7 +2,8 @@ from typing import Generator
 from pytest_postgresql import factories  # type:ignore
 from pytest_postgresql.janitor import DatabaseJanitor
 from pytest_postgresql.executor import PostgreSQLExecutor
-from sqlalchemy import create_engine
+from sqlalchemy import NullPool, create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from api.configuration import Configuration
 from api.models import Base
@@ -55,10 +56,21 @@ def configuration_fixture(
                 bind=engine, autoflush=False, autocommit=False
             )
 
+            # the test client may run each request in a new event loop, so
+            # the connections can't be pooled across requests
+            async_engine = create_async_engine(
+                f"postgresql+asyncpg://{pg_user}:@{pg_host}:{pg_port}/{pg_db}",
+                poolclass=NullPool,
+            )
+            AsyncSessionLocal = async_sessionmaker(
+                bind=async_engine, autoflush=False, expire_on_commit=False
+            )
+
             temp_dir = tempfile.TemporaryDirectory()
 
             yield Configuration(
                 SessionLocal,
                 "secret",
                 temp_dir.name,
+                AsyncSessionLocal,
             )
@@ -1,11 +1,25 @@
 from copy import deepcopy
 from typing import Any
 from fastapi.testclient import TestClient
+from sqlalchemy import update
 from api.configuration import Configuration
+from api.crud.order import (
+    OrderEvent,
+    get_order_with_validation,
+    update_order_status,
+)
 from api.dependencies.configuration import get_configuration
+from api.dependencies.id import Role
+from api.dependencies.state import create_state
+from api.errors import ConflictingError
+from api.models.order import CancelledOrder, Order, PreparingOrder
+from api.schemas.order import CancelledOrderUpdate, OrderStatusFlag
 from api import app
 
+import asyncio
 import jwt
+import pytest
+import time
 
 
 def test_order(configuration_fixture: Configuration):
@@ -452,6 +466,18 @@ def test_order(configuration_fixture: Configuration):
     )
     assert get_second_order_status_response.json()["reason"] == "i'm full"
 
+    customer_get_cancelled_orders_response = test_client.get(
+        "/orders/?status=CANCELLED",
+        headers={"Authorization": f"Bearer {second_customer_jwt}"},
+    )
+
+    assert customer_get_cancelled_orders_response.status_code == 200
+    assert len(customer_get_cancelled_orders_response.json()) == 1
+    assert (
+        customer_get_cancelled_orders_response.json()[0]["status"]
+        == get_second_order_status_response.json()
+    )
+
     twice_cancel_response = test_client.put(
         f"/orders/{second_order_response.json()}/status",
         json={"type": "CANCELLED", "reason": "i'm full"},
@@ -479,6 +505,18 @@ def test_order(configuration_fixture: Configuration):
     assert get_preparing_order_status_response.status_code == 200
     assert get_preparing_order_status_response.json()["type"] == "PREPARING"
 
+    merchant_get_preparing_orders_response = test_client.get(
+        "/orders/?status=PREPARING",
+        headers={"Authorization": f"Bearer {first_merchant_jwt}"},
+    )
+
+    assert merchant_get_preparing_orders_response.status_code == 200
+    assert len(merchant_get_preparing_orders_response.json()) == 1
+    assert (
+        merchant_get_preparing_orders_response.json()[0]["status"]
+        == get_preparing_order_status_response.json()
+    )
+
     ready_order_response = test_client.put(
         f"/orders/{first_order_response.json()}/status",
         json={"type": "READY"},
@@ -496,6 +534,18 @@ def test_order(configuration_fixture: Configuration):
 
     assert get_ready_order_status_response.json()["type"] == "READY"
 
+    merchant_get_ready_orders_response = test_client.get(
+        "/orders/?status=READY",
+        headers={"Authorization": f"Bearer {first_merchant_jwt}"},
+    )
+
+    assert merchant_get_ready_orders_response.status_code == 200
+    assert len(merchant_get_ready_orders_response.json()) == 1
+    assert (
+        merchant_get_ready_orders_response.json()[0]["status"]
+        == get_ready_order_status_response.json()
+    )
+
     merchant_settle_order_response = test_client.put(
         f"/orders/{first_order_response.json()}/status",
         json={"type": "SETTLED"},
@@ -554,6 +604,31 @@ def test_order(configuration_fixture: Configuration):
         get_cancelled_order_status_response.json()["reason"] == "out of stock"
     )
 
+    # the most recent order first
+    customer_get_orders_response = test_client.get(
+        "/orders/",
+        headers={"Authorization": f"Bearer {first_customer_jwt}"},
+    )
+
+    assert customer_get_orders_response.status_code == 200
+    assert len(customer_get_orders_response.json()) == 2
+
+    cancelled_order, settled_order = customer_get_orders_response.json()
+
+    assert cancelled_order["id"] == first_order_response.json()
+    assert cancelled_order["status"]["type"] == "CANCELLED"
+    assert cancelled_order["status"]["cancelled_by"] == "MERCHANT"
+    assert cancelled_order["status"]["reason"] == "out of stock"
+    assert (
+        cancelled_order["status"] == get_cancelled_order_status_response.json()
+    )
+
+    assert settled_order["status"]["type"] == "SETTLED"
+    assert (
+        settled_order["status"]["settled_at"]
+        == get_settled_order_status_response.json()["settled_at"]
+    )
+
     _: int = test_client.post(
         "/orders/",
         json=steak_order,
@@ -588,3 +663,95 @@ def test_order(configuration_fixture: Configuration):
 
     assert restaurant_queue.json()["queue_count"] == 3
     assert restaurant_queue.json()["estimated_time"] == 30
+
+    # the orders are paginated, the most recent orders first
+    first_page_response = test_client.get(
+        "/orders/?limit=2",
+        headers={"Authorization": f"Bearer {first_customer_jwt}"},
+    )
+
+    assert first_page_response.status_code == 200
+    assert len(first_page_response.json()) == 2
+    assert first_page_response.json()[0]["id"] == third_order_id
+
+    second_page_response = test_client.get(
+        "/orders/?limit=2&offset=1",
+        headers={"Authorization": f"Bearer {first_customer_jwt}"},
+    )
+
+    assert second_page_response.status_code == 200
+    assert (
+        second_page_response.json()[0]["id"]
+        == first_page_response.json()[1]["id"]
+    )
+
+    invalid_limit_response = test_client.get(
+        "/orders/?limit=0",
+        headers={"Authorization": f"Bearer {first_customer_jwt}"},
+    )
+
+    assert invalid_limit_response.status_code == 400
+
+    too_large_limit_response = test_client.get(
+        "/orders/?limit=101",
+        headers={"Authorization": f"Bearer {first_customer_jwt}"},
+    )
+
+    assert too_large_limit_response.status_code == 400
+    assert too_large_limit_response.json() == {
+        "detail": {"error": "limit must not be greater than 100"}
+    }
+
+    # the status changed by someone else after the order has been loaded
+    conflicting_order_id: int = test_client.post(
+        "/orders/",
+        json=steak_order,
+        headers={"Authorization": f"Bearer {first_customer_jwt}"},
+    ).json()
+
+    async def cancel_conflicting_order() -> None:
+        async with create_state(configuration_fixture) as state:
+            order = await get_order_with_validation(
+                state, first_customer_id, Role.CUSTOMER, conflicting_order_id
+            )
+
+            assert order.status == OrderStatusFlag.ORDERED
+
+            with configuration_fixture.create_session() as session:
+                session.execute(
+                    update(Order)
+                    .where(Order.id == conflicting_order_id)
+                    .values(status=OrderStatusFlag.PREPARING)
+                )
+                session.add(
+                    PreparingOrder(
+                        order_id=conflicting_order_id,
+                        prepared_at=int(time.time()),
+                    )
+                )
+                session.commit()
+
+            await update_order_status(
+                state,
+                OrderEvent(configuration_fixture),
+                first_customer_id,
+                Role.CUSTOMER,
+                conflicting_order_id,
+                CancelledOrderUpdate(reason="changed my mind"),
+            )
+
+    with pytest.raises(ConflictingError) as conflicting_error:
+        asyncio.run(cancel_conflicting_order())
+
+    assert conflicting_error.value.status_code == 409
+
+    with configuration_fixture.create_session() as session:
+        assert session.get(CancelledOrder, conflicting_order_id) is None
+
+    get_conflicting_order_status_response = test_client.get(
+        f"/orders/{conflicting_order_id}/status",
+        headers={"Authorization": f"Bearer {first_customer_jwt}"},
+    )
+
+    assert get_conflicting_order_status_response.status_code == 200
+    assert get_conflicting_order_status_response.json()["type"] == "PREPARING"
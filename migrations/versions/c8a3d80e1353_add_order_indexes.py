@@ -0,0 +1,46 @@
+"""add order indexes
+
+Revision ID: c8a3d80e1353
+Revises: 76ea71cdc5d3
+Create Date: 2026-10-14 10:12:31.482906
+
+"""
+
+from typing import Sequence, Union
+
+from alembic.op import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c8a3d80e1353"
+down_revision: Union[str, None] = "76ea71cdc5d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the customer's order list filters by customer, status, and restaurant
+    create_index(
+        "ix_orders_customer_id_status_restaurant_id",
+        "orders",
+        ["customer_id", "status", "restaurant_id"],
+    )
+
+    # the merchant's order list and the queues filter by restaurant and status
+    create_index(
+        "ix_orders_restaurant_id_status",
+        "orders",
+        ["restaurant_id", "status"],
+    )
+
+    create_index(
+        "ix_restaurants_merchant_id",
+        "restaurants",
+        ["merchant_id"],
+    )
+
+
+def downgrade() -> None:
+    drop_index("ix_restaurants_merchant_id", "restaurants")
+    drop_index("ix_orders_restaurant_id_status", "orders")
+    drop_index("ix_orders_customer_id_status_restaurant_id", "orders")